@@ -13,8 +13,8 @@ ml_api = Blueprint('ml_api', __name__, url_prefix='/api/ml')
 def health_check():
     """Check if ML API is working"""
     try:
-        from ml_models.difficulty_classifier import DifficultyClassifier
-        classifier = DifficultyClassifier()
+        from ml_models.difficulty_classifier import get_difficulty_classifier
+        classifier = get_difficulty_classifier()
         
         return jsonify({
             'status': 'healthy',
@@ -38,8 +38,8 @@ def classify_difficulty():
         if not question_text:
             return jsonify({'error': 'question_text is required'}), 400
         
-        from ml_models.difficulty_classifier import DifficultyClassifier
-        classifier = DifficultyClassifier()
+        from ml_models.difficulty_classifier import get_difficulty_classifier
+        classifier = get_difficulty_classifier()
         
         # Get prediction
         result = classifier.predict(question_text)
@@ -60,9 +60,16 @@ def classify_difficulty():
 def classify_all_questions():
     """Classify all questions in the database"""
     try:
-        from ml_models.difficulty_classifier import DifficultyClassifier
+        from ml_models.difficulty_classifier import get_difficulty_classifier
         
-        classifier = DifficultyClassifier()
+        classifier = get_difficulty_classifier()
+        
+        # While the background fit runs predictions are rule-based; don't persist those
+        if classifier.is_training:
+            return jsonify({
+                'success': False,
+                'error': 'Classifier is still training, try again shortly'
+            }), 503
         
         # Get all questions from database
         conn = sqlite3.connect("aptitude_exam.db")
@@ -80,10 +87,11 @@ def classify_all_questions():
         classified_count = 0
         updated_count = 0
         
-        for question_id, question_text, current_difficulty in questions:
+        # Get AI predictions for every question in one batch
+        results = classifier.predict_batch([row[1] for row in questions])
+        
+        for (question_id, question_text, current_difficulty), result in zip(questions, results):
             try:
-                # Get AI prediction
-                result = classifier.predict(question_text)
                 predicted_difficulty = result['difficulty']
                 
                 # Update only if different from current or if current is None/empty
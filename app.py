@@ -267,6 +267,11 @@ def initialize_database():
         )
     ''')
     
+    # Indexes for difficulty/topic lookups (counts, filtered selection, training fetch)
+    conn.execute('''CREATE INDEX IF NOT EXISTS idx_question_difficulty_topic ON question(difficulty, topic)''')
+    conn.execute('''CREATE INDEX IF NOT EXISTS idx_question_topic ON question(topic)''')
+    conn.execute('''CREATE INDEX IF NOT EXISTS idx_question_text ON question(question_text)''')
+    
     # Results table (using YOUR column names)
     conn.execute('''
         CREATE TABLE IF NOT EXISTS results (
@@ -382,6 +387,34 @@ def initialize_database():
     print("✅ Database initialization complete")
 
 
+def _question_norm_hash(question_text):
+    """SHA1 of the normalized question prefix; must match _question_hash in one_click_ai_generator.py"""
+    prefix = (question_text or '').strip().lower()[:50]
+    return hashlib.sha1(prefix.encode()).digest()
+
+
+def ensure_question_norm_hash_column(conn):
+    """Ensure question.norm_hash and its unique index exist for generator deduplication"""
+    columns = [column[1] for column in conn.execute("PRAGMA table_info(question)").fetchall()]
+    
+    if 'norm_hash' not in columns:
+        conn.execute("ALTER TABLE question ADD COLUMN norm_hash BLOB")
+        
+        # Backfill once, before the unique index exists. The oldest row of each
+        # duplicate group gets the hash; later copies keep NULL, which the index allows
+        seen = set()
+        updates = []
+        for question_id, question_text in conn.execute("SELECT id, question_text FROM question ORDER BY id").fetchall():
+            norm_hash = _question_norm_hash(question_text)
+            if norm_hash not in seen:
+                seen.add(norm_hash)
+                updates.append((norm_hash, question_id))
+        conn.executemany("UPDATE question SET norm_hash = ? WHERE id = ?", updates)
+        print(f"✅ Added norm_hash column to question table ({len(updates)} questions hashed)")
+    
+    conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS ix_question_norm_hash ON question(norm_hash)')
+
+
 def init_database():
     """Initialize database with all required tables"""
     conn = get_db_connection()
@@ -423,6 +456,14 @@ def init_database():
     except Exception:
         pass  # Column already exists
     
+    # Indexes for difficulty/topic lookups (counts, filtered selection, training fetch)
+    conn.execute('''CREATE INDEX IF NOT EXISTS idx_question_difficulty_topic ON question(difficulty, topic)''')
+    conn.execute('''CREATE INDEX IF NOT EXISTS idx_question_topic ON question(topic)''')
+    conn.execute('''CREATE INDEX IF NOT EXISTS idx_question_text ON question(question_text)''')
+    
+    # Duplicate guard used by the one-click generator
+    ensure_question_norm_hash_column(conn)
+    
     # Results table
     conn.execute('''
         CREATE TABLE IF NOT EXISTS results (
@@ -1517,20 +1558,31 @@ def api_submit_exam():
         conn = get_db_connection()
         correct_count = 0
         
+        # Fetch every answered question's correct option in one query
+        correct_options = {}
+        if answers_dict:
+            placeholders = ','.join('?' * len(answers_dict))
+            for row in conn.execute(
+                f'SELECT id, correct_option FROM question WHERE id IN ({placeholders})',
+                list(answers_dict)
+            ):
+                correct_options[str(row['id'])] = str(row['correct_option']).strip().upper()
+        
+        # (question_id, submitted answer, is_correct) rows for the responses table
+        graded_responses = []
+        
         for question_id, user_answer in answers_dict.items():
-            question = conn.execute(
-                'SELECT correct_option FROM question WHERE id = ?', 
-                (question_id,)
-            ).fetchone()
+            correct_answer = correct_options.get(str(question_id))
             
-            if question:
+            if correct_answer is not None:
                 # Normalize both answers to uppercase for comparison
-                correct_answer = str(question['correct_option']).strip().upper()
                 submitted_answer = str(user_answer).strip().upper()
+                is_correct = 1 if correct_answer == submitted_answer else 0
+                graded_responses.append((question_id, submitted_answer, is_correct))
                 
                 app.logger.info(f"Q{question_id}: User={submitted_answer}, Correct={correct_answer}")
                 
-                if correct_answer == submitted_answer:
+                if is_correct:
                     correct_count += 1
                     app.logger.info(f"✅ Question {question_id}: CORRECT")
                 else:
@@ -1561,23 +1613,13 @@ def api_submit_exam():
         
         result_id = cursor.lastrowid
         
-        # Save individual responses for tracking
-        for question_id, user_answer in answers_dict.items():
-            question = conn.execute(
-                'SELECT correct_option FROM question WHERE id = ?', 
-                (question_id,)
-            ).fetchone()
-            
-            if question:
-                correct_answer = str(question['correct_option']).strip().upper()
-                submitted_answer = str(user_answer).strip().upper()
-                is_correct = 1 if correct_answer == submitted_answer else 0
-                
-                cursor.execute('''
-                    INSERT INTO responses 
-                    (user_id, question_id, selected_option, is_correct, session_id)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (user_id, question_id, submitted_answer, is_correct, session_id))
+        # Save individual responses for tracking, graded above, in one batch
+        cursor.executemany('''
+            INSERT INTO responses 
+            (user_id, question_id, selected_option, is_correct, session_id)
+            VALUES (?, ?, ?, ?, ?)
+        ''', [(user_id, question_id, submitted_answer, is_correct, session_id)
+              for question_id, submitted_answer, is_correct in graded_responses])
         
         conn.commit()
         conn.close()
@@ -5001,7 +5043,7 @@ def api_task_status(task_id):
 def api_test_question_generation():
     """Test question generation with sample context - FIXED"""
     try:
-        from one_click_ai_generator import OneClickAIGenerator
+        from one_click_ai_generator import get_one_click_generator
         
         # Sample context for testing
         sample_context = """
@@ -5011,7 +5053,7 @@ def api_test_question_generation():
         Common types include supervised learning, unsupervised learning, and reinforcement learning.
         """
         
-        generator = OneClickAIGenerator()
+        generator = get_one_click_generator()
         
         # Generate a single test question quickly
         test_question = generator.generate_from_text(sample_context, "Machine Learning")
@@ -1,17 +1,73 @@
 #!/usr/bin/env python3
 """Adaptive Testing Engine using Item Response Theory"""
 
-import numpy as np
 import sqlite3
 import json
+import logging
 import math
 import random
-from datetime import datetime, timedelta
+import threading
+from collections import deque
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from statistics import fmean
 from config.ml_config import MLConfig
 from typing import List, Dict, Tuple, Optional
 
+logger = logging.getLogger(__name__)
+
+# Column order of candidate rows returned by _fetch_available_rows
+QUESTION_FIELDS = ('id', 'question_text', 'option_a', 'option_b', 'option_c', 'option_d',
+                   'correct_option', 'topic', 'difficulty')
+_ROW_ID = 0
+_ROW_DIFFICULTY = 8
+
+
+# Logistic lookup table for item_response_probability. Exponents outside the
+# table are far past the 0.01/0.99 clamp, and linear interpolation between
+# 1024 steps stays within ~1e-5 of the exact sigmoid.
+_SIGMOID_RANGE = 10.0
+_SIGMOID_STEPS = 1024
+_SIGMOID_SCALE = _SIGMOID_STEPS / (2 * _SIGMOID_RANGE)
+# One spare entry past the end absorbs float rounding at the upper edge
+_SIGMOID_TABLE = tuple(1 / (1 + math.exp(_SIGMOID_RANGE - i / _SIGMOID_SCALE))
+                       for i in range(_SIGMOID_STEPS + 2))
+
+
+def _sigmoid(z: float) -> float:
+    """Logistic function by linear interpolation in _SIGMOID_TABLE"""
+    if not -_SIGMOID_RANGE < z < _SIGMOID_RANGE:
+        return 1.0 if z > 0 else 0.0
+    position = (z + _SIGMOID_RANGE) * _SIGMOID_SCALE
+    index = int(position)
+    low = _SIGMOID_TABLE[index]
+    return low + (_SIGMOID_TABLE[index + 1] - low) * (position - index)
+
+
+def _topic_exclude_clause(topic_count: int) -> str:
+    """SQL fragment excluding topics through bound placeholders"""
+    if not topic_count:
+        return ""
+    return f"AND topic NOT IN ({','.join('?' * topic_count)})"
+
 class AdaptiveTestEngine:
+    # Rolling trend state per (student_id, session_id). Kept on the class because
+    # the API creates a fresh engine for every request.
+    _trend_state: Dict[Tuple, Dict] = {}
+    # Response history per (student_id, session_id), appended as answers are recorded.
+    # Each entry keeps the (COUNT(*), MAX(id)) of adaptive_responses it reflects, so a
+    # history changed by another worker process is noticed and reloaded.
+    _session_responses: Dict[Tuple, Dict] = {}
+    # Unused target-difficulty candidates from the last fetch, per (student_id, session_id)
+    _candidate_cache: Dict[Tuple, Dict] = {}
+    # Guards the three per-session caches above; request threads share them
+    _cache_lock = threading.RLock()
+    max_cached_sessions = 500
+    # Candidate query text keyed by number of excluded topics, so the SQL string
+    # stays identical between calls and SQLite can reuse the prepared statement
+    _candidate_queries: Dict[int, str] = {}
+    trend_window = 3  # Number of most recent answers compared against the rest
+
     def __init__(self):
         self.config = MLConfig()
         self.difficulty_map = {'Easy': 1, 'Medium': 2, 'Hard': 3}
@@ -22,6 +78,8 @@ class AdaptiveTestEngine:
         self.min_questions = 5      # Minimum questions before adaptation
         self.max_questions = 20     # Maximum questions per test
         self.target_accuracy = 0.75 # Target accuracy for optimal learning
+        self.selection_jitter = 0.1 # Max random boost so ties don't always pick the same question
+        self._rng = random.Random()
         
     def estimate_student_ability(self, responses: List[Dict]) -> float:
         """
@@ -86,63 +144,64 @@ class AdaptiveTestEngine:
         # Convert difficulty to IRT scale
         difficulty_irt = (difficulty - 2) * 1.5  # Easy=-1.5, Medium=0, Hard=1.5
         
-        try:
-            # 1PL IRT Model: P(θ) = 1 / (1 + exp(-(θ - b)))
-            exponent = discrimination * (theta - difficulty_irt)
-            probability = 1 / (1 + math.exp(-exponent))
-            return max(0.01, min(0.99, probability))  # Avoid extreme values
-        except OverflowError:
-            return 0.99 if theta > difficulty_irt else 0.01
+        # 1PL IRT Model: P(θ) = 1 / (1 + exp(-(θ - b)))
+        exponent = discrimination * (theta - difficulty_irt)
+        probability = _sigmoid(exponent)
+        return max(0.01, min(0.99, probability))  # Avoid extreme values
     
     def select_next_question(self, student_id: int, session_id: str, 
                            exclude_topics: List[str] = None) -> Optional[Dict]:
         """
         Select the most appropriate next question using improved adaptive algorithm
         """
+        key = (student_id, session_id)
+        exclude_topics = exclude_topics or []
+        
         # Get student's response history
         responses = self.get_student_responses(student_id, session_id)
         
         # Estimate current ability
         current_ability = self.estimate_student_ability(responses)
         
-        # Get available questions (IMPROVED VERSION)
-        available_questions = self.get_available_questions_improved(
-            student_id, session_id, exclude_topics or []
-        )
-        
-        if not available_questions:
-            return None
-        
         # IMPROVED QUESTION SELECTION LOGIC
         # Determine target difficulty based on ability and performance
         target_difficulty = self.determine_target_difficulty(current_ability, responses)
         
-        # Filter questions by target difficulty first
-        difficulty_filtered = [q for q in available_questions 
-                              if q.get('difficulty', 'Medium') == target_difficulty]
-        
-        # If no questions at target difficulty, expand search
-        if not difficulty_filtered:
-            print(f"⚠️ No {target_difficulty} questions available, expanding search...")
-            difficulty_filtered = available_questions
-        
-        # Select question with maximum information value
-        best_question = None
-        max_information = 0
-        
-        for question in difficulty_filtered:
-            difficulty_level = self.difficulty_map.get(question.get('difficulty', 'Medium'), 2)
+        # While the target difficulty holds steady, every candidate at that level carries
+        # the same information, so the next unanswered one from the last (already
+        # shuffled) fetch is as good as a fresh query
+        best_row = self._next_cached_candidate(key, target_difficulty, exclude_topics, responses)
+        if best_row is not None:
+            max_information = self._information_with_jitter([best_row], current_ability)[1]
+        else:
+            # Get available questions as raw rows; only the winner is turned into a dict
+            available_rows = self._fetch_available_rows(student_id, session_id, exclude_topics)
             
-            # Calculate Fisher Information
-            prob = self.item_response_probability(current_ability, difficulty_level)
-            information = prob * (1 - prob)  # Maximum at p=0.5
+            if not available_rows:
+                with self._cache_lock:
+                    self._candidate_cache.pop(key, None)
+                return None
             
-            # Add randomness to avoid same question
-            information += random.uniform(0, 0.1)  # Small random boost
+            # Filter questions by target difficulty first
+            difficulty_filtered = [row for row in available_rows
+                                   if row[_ROW_DIFFICULTY] == target_difficulty]
             
-            if information > max_information:
-                max_information = information
-                best_question = question
+            # If no questions at target difficulty, expand search
+            if not difficulty_filtered:
+                logger.debug("No %s questions available, expanding search", target_difficulty)
+                best_row, max_information = self._information_with_jitter(available_rows, current_ability)
+                with self._cache_lock:
+                    self._candidate_cache.pop(key, None)
+            else:
+                best_row, max_information = self._information_with_jitter(difficulty_filtered, current_ability)
+                with self._cache_lock:
+                    self._candidate_cache[key] = {
+                        'target': target_difficulty,
+                        'exclude_topics': tuple(exclude_topics),
+                        'rows': deque(row for row in difficulty_filtered if row is not best_row)
+                    }
+        
+        best_question = self._row_to_question(best_row) if best_row else None
         
         # Add adaptive metadata
         if best_question:
@@ -158,12 +217,58 @@ class AdaptiveTestEngine:
                 'total_responses': len(responses)
             }
             
-            print(f"🎯 Selected question: ID={best_question['id']}, "
-                  f"Difficulty={best_question.get('difficulty')}, "
-                  f"Ability={current_ability:.2f}, Target={target_difficulty}")
+            logger.debug("Selected question: ID=%s, Difficulty=%s, Ability=%.2f, Target=%s",
+                         best_question['id'], best_question.get('difficulty'),
+                         current_ability, target_difficulty)
         
         return best_question
 
+    def _information_with_jitter(self, rows: List[Tuple], ability: float) -> Tuple[Optional[Tuple], float]:
+        """Return the row with maximum Fisher information (plus random boost) and its score"""
+        best_row = None
+        max_information = 0
+        
+        # Add randomness to avoid same question: draw every candidate's boost up front
+        rng_random = self._rng.random
+        jitter = [rng_random() * self.selection_jitter for _ in rows]
+        
+        for row, boost in zip(rows, jitter):
+            difficulty_level = self.difficulty_map.get(row[_ROW_DIFFICULTY], 2)
+            
+            # Calculate Fisher Information
+            prob = self.item_response_probability(ability, difficulty_level)
+            information = prob * (1 - prob)  # Maximum at p=0.5
+            information += boost  # Small random boost
+            
+            if information > max_information:
+                max_information = information
+                best_row = row
+        
+        return best_row, max_information
+
+    def _next_cached_candidate(self, key: Tuple, target_difficulty: str,
+                               exclude_topics: List[str], responses: List[Dict]) -> Optional[Tuple]:
+        """
+        Pop the next unanswered candidate left over from the previous selection, if still
+        valid. responses comes from get_student_responses, so it matches the database.
+        """
+        with self._cache_lock:
+            cached = self._candidate_cache.get(key)
+            if (cached is None or cached['target'] != target_difficulty
+                    or cached['exclude_topics'] != tuple(exclude_topics)):
+                return None
+            
+            answered = {r['question_id'] for r in responses}
+            rows = cached['rows']
+            while rows:
+                row = rows.popleft()
+                if row[_ROW_ID] not in answered:
+                    return row
+            
+            # Exhausted: refill from SQL on this turn
+            del self._candidate_cache[key]
+            return None
+
     def determine_target_difficulty(self, ability: float, responses: List[Dict]) -> str:
         """
         Determine target difficulty based on student ability and recent performance
@@ -175,7 +280,7 @@ class AdaptiveTestEngine:
         recent_correct = sum(1 for r in responses[-3:] if r['correct'])
         recent_accuracy = recent_correct / 3
         
-        print(f"📊 Recent accuracy: {recent_accuracy:.2f}, Ability: {ability:.2f}")
+        logger.debug("Recent accuracy: %.2f, Ability: %.2f", recent_accuracy, ability)
         
         # Adaptive difficulty selection - MORE AGGRESSIVE PROGRESSION
         if recent_accuracy >= 0.7 and ability > 0.0:  # Lower threshold for Hard
@@ -185,55 +290,57 @@ class AdaptiveTestEngine:
         else:
             return 'Easy'
 
+    @staticmethod
+    def _row_to_question(row: Tuple) -> Dict:
+        """Wrap a candidate row in the question dict shape used by callers"""
+        return dict(zip(QUESTION_FIELDS, row))
+
     def get_available_questions_improved(self, student_id: int, session_id: str, 
                                        exclude_topics: List[str]) -> List[Dict]:
         """
         Get questions that haven't been answered in this session with better variety
         """
+        return [self._row_to_question(row)
+                for row in self._fetch_available_rows(student_id, session_id, exclude_topics)]
+
+    def _fetch_available_rows(self, student_id: int, session_id: str,
+                              exclude_topics: List[str]) -> List[Tuple]:
+        """Fetch unanswered candidate questions as tuples in QUESTION_FIELDS order"""
         conn = sqlite3.connect("aptitude_exam.db")
         cursor = conn.cursor()
         
         # Get questions not yet answered in this session
-        exclude_topics_str = "', '".join(exclude_topics) if exclude_topics else ""
-        exclude_clause = f"AND topic NOT IN ('{exclude_topics_str}')" if exclude_topics else ""
-        
-        # IMPROVED QUERY: Get more variety and check all available questions
-        query = f"""
-        SELECT q.id, q.question_text, q.option_a, q.option_b, q.option_c, q.option_d, 
-               q.correct_option, q.topic, q.difficulty
-        FROM question q
-        WHERE q.id NOT IN (
-            SELECT DISTINCT question_id FROM adaptive_responses 
-            WHERE student_id = ? AND session_id = ?
-        )
-        {exclude_clause}
-        ORDER BY RANDOM()  -- Add randomness to question order
-        LIMIT 100  -- Increased limit for more variety
-        """
-        
-        cursor.execute(query, (student_id, session_id))
-        
-        questions = []
-        for row in cursor.fetchall():
-            questions.append({
-                'id': row[0],
-                'question_text': row[1],
-                'option_a': row[2],
-                'option_b': row[3],
-                'option_c': row[4],
-                'option_d': row[5],
-                'correct_option': row[6],
-                'topic': row[7],
-                'difficulty': row[8]
-            })
-        
+        query = self._candidate_queries.get(len(exclude_topics))
+        if query is None:
+            # IMPROVED QUERY: Get more variety and check all available questions
+            query = f"""
+            SELECT q.id, q.question_text, q.option_a, q.option_b, q.option_c, q.option_d, 
+                   q.correct_option, q.topic, q.difficulty
+            FROM question q
+            WHERE q.id NOT IN (
+                SELECT DISTINCT question_id FROM adaptive_responses 
+                WHERE student_id = ? AND session_id = ?
+            )
+            {_topic_exclude_clause(len(exclude_topics))}
+            ORDER BY RANDOM()  -- Add randomness to question order
+            LIMIT 100  -- Increased limit for more variety
+            """
+            self._candidate_queries[len(exclude_topics)] = query
+        
+        cursor.execute(query, (student_id, session_id, *exclude_topics))
+        rows = cursor.fetchall()
         conn.close()
         
-        print(f"📋 Available questions: {len(questions)} (Easy: {len([q for q in questions if q['difficulty']=='Easy'])}, "
-              f"Medium: {len([q for q in questions if q['difficulty']=='Medium'])}, "
-              f"Hard: {len([q for q in questions if q['difficulty']=='Hard'])})")
+        # Per-difficulty counts are only worth computing when someone will see them
+        if logger.isEnabledFor(logging.DEBUG):
+            counts = {'Easy': 0, 'Medium': 0, 'Hard': 0}
+            for row in rows:
+                if row[_ROW_DIFFICULTY] in counts:
+                    counts[row[_ROW_DIFFICULTY]] += 1
+            logger.debug("Available questions: %d (Easy: %d, Medium: %d, Hard: %d)",
+                         len(rows), counts['Easy'], counts['Medium'], counts['Hard'])
         
-        return questions
+        return rows
     
     def update_question_parameters(self, question_id: int, responses: List[Dict]):
         """
@@ -272,8 +379,19 @@ class AdaptiveTestEngine:
         conn.commit()
         conn.close()
     
+    def _cache_session(self, key: Tuple, responses: List[Dict], stamp: Tuple):
+        """Remember a session's responses, evicting the oldest sessions past the cap"""
+        with self._cache_lock:
+            self._session_responses[key] = {'responses': responses, 'stamp': stamp}
+            while len(self._session_responses) > self.max_cached_sessions:
+                oldest = next(iter(self._session_responses))
+                del self._session_responses[oldest]
+                self._trend_state.pop(oldest, None)
+                self._candidate_cache.pop(oldest, None)
+    
     def get_student_responses(self, student_id: int, session_id: str) -> List[Dict]:
         """Get student's response history for current session"""
+        key = (student_id, session_id)
         conn = sqlite3.connect("aptitude_exam.db")
         cursor = conn.cursor()
         
@@ -292,25 +410,44 @@ class AdaptiveTestEngine:
         )
         """)
         
+        # Answers recorded through another worker change the count or the latest id
+        with self._cache_lock:
+            cached = self._session_responses.get(key)
+        if cached is not None:
+            cursor.execute("""
+            SELECT COUNT(*), MAX(id) FROM adaptive_responses
+            WHERE student_id = ? AND session_id = ?
+            """, key)
+            with self._cache_lock:
+                # Compared under the lock, since record_response may have advanced the stamp meanwhile
+                if tuple(cursor.fetchone()) == cached['stamp']:
+                    conn.close()
+                    return list(cached['responses'])
+                # Another worker served this session; its picks may overlap our leftovers
+                self._candidate_cache.pop(key, None)
+        
         cursor.execute("""
-        SELECT question_id, difficulty, difficulty_level, correct, time_taken, response_time
+        SELECT question_id, difficulty, difficulty_level, correct, time_taken, response_time, id
         FROM adaptive_responses 
         WHERE student_id = ? AND session_id = ?
         ORDER BY response_time
-        """, (student_id, session_id))
+        """, key)
         
         responses = []
+        max_id = None
         for row in cursor.fetchall():
             responses.append({
                 'question_id': row[0],
                 'difficulty': row[1],
                 'difficulty_level': row[2],
-                'correct': bool(row[3]),
+                'correct': int(row[3]),
                 'time_taken': row[4],
                 'response_time': row[5]
             })
+            max_id = row[6] if max_id is None else max(max_id, row[6])
         
         conn.close()
+        self._cache_session(key, responses, (len(responses), max_id))
         return responses
     
     def get_available_questions(self, student_id: int, session_id: str, 
@@ -320,8 +457,7 @@ class AdaptiveTestEngine:
         cursor = conn.cursor()
         
         # Get questions not yet answered in this session
-        exclude_topics_str = "', '".join(exclude_topics) if exclude_topics else ""
-        exclude_clause = f"AND topic NOT IN ('{exclude_topics_str}')" if exclude_topics else ""
+        exclude_clause = _topic_exclude_clause(len(exclude_topics or ()))
         
         query = f"""
         SELECT q.id, q.question_text, q.option_a, q.option_b, q.option_c, q.option_d, 
@@ -335,21 +471,8 @@ class AdaptiveTestEngine:
         LIMIT 50
         """
         
-        cursor.execute(query, (student_id, session_id))
-        
-        questions = []
-        for row in cursor.fetchall():
-            questions.append({
-                'id': row[0],
-                'question_text': row[1],
-                'option_a': row[2],
-                'option_b': row[3],
-                'option_c': row[4],
-                'option_d': row[5],
-                'correct_option': row[6],
-                'topic': row[7],
-                'difficulty': row[8]
-            })
+        cursor.execute(query, (student_id, session_id, *(exclude_topics or ())))
+        questions = [self._row_to_question(row) for row in cursor.fetchall()]
         
         conn.close()
         return questions
@@ -377,20 +500,43 @@ class AdaptiveTestEngine:
         is_correct = (selected_option.lower() == correct_option.lower())
         difficulty_level = self.difficulty_map.get(difficulty, 2)
         
-        # Store response
+        # Store response (timestamp in the same UTC format as CURRENT_TIMESTAMP)
+        response_time = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
         cursor.execute("""
         INSERT INTO adaptive_responses 
-        (student_id, session_id, question_id, difficulty, difficulty_level, correct, time_taken)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (student_id, session_id, question_id, difficulty, difficulty_level, is_correct, time_taken))
+        (student_id, session_id, question_id, difficulty, difficulty_level, correct, time_taken, response_time)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (student_id, session_id, question_id, difficulty, difficulty_level, is_correct, time_taken,
+              response_time))
         
+        response_id = cursor.lastrowid
         conn.commit()
         conn.close()
         
+        # Keep the cached history in step; get_student_responses below reloads it
+        # if answers from another worker are missing
+        with self._cache_lock:
+            cached = self._session_responses.get((student_id, session_id))
+            if cached is not None:
+                cached['responses'].append({
+                    'question_id': question_id,
+                    'difficulty': difficulty,
+                    'difficulty_level': difficulty_level,
+                    'correct': int(is_correct),
+                    'time_taken': time_taken,
+                    'response_time': response_time
+                })
+                cached['stamp'] = (len(cached['responses']), response_id)
+        
         # Get updated ability estimate
         responses = self.get_student_responses(student_id, session_id)
         new_ability = self.estimate_student_ability(responses)
         
+        with self._cache_lock:
+            performance_trend = self._trend_from_state(
+                self._update_trend_state(student_id, session_id, is_correct, responses)
+            )
+        
         # Generate performance analysis
         analysis = {
             'correct': is_correct,
@@ -398,25 +544,50 @@ class AdaptiveTestEngine:
             'student_ability': new_ability,
             'total_questions': len(responses),
             'accuracy': sum(1 for r in responses if r['correct']) / len(responses),
-            'performance_trend': self.analyze_performance_trend(responses),
+            'performance_trend': performance_trend,
             'recommendation': self.get_performance_recommendation(new_ability, responses)
         }
         
         return analysis
     
-    def analyze_performance_trend(self, responses: List[Dict]) -> str:
-        """Analyze if student performance is improving, declining, or stable"""
-        if len(responses) < 3:
-            return 'insufficient_data'
+    def _new_trend_state(self, responses: List[Dict] = ()) -> Dict:
+        """Build rolling trend counters from a response history in one pass"""
+        state = {'recent': deque(maxlen=self.trend_window), 'total_correct': 0, 'total_count': 0}
+        for r in responses:
+            correct = bool(r['correct'])
+            state['recent'].append(correct)
+            state['total_correct'] += correct
+            state['total_count'] += 1
+        return state
+    
+    def _update_trend_state(self, student_id: int, session_id: str, is_correct: bool,
+                            responses: List[Dict]) -> Dict:
+        """Record one answer in the session's rolling trend state"""
+        key = (student_id, session_id)
+        state = self._trend_state.get(key)
+        
+        # Reseed from history on first use or if another writer got ahead of us
+        if state is None or state['total_count'] + 1 != len(responses):
+            state = self._new_trend_state(responses)
+            self._trend_state[key] = state
+        else:
+            state['recent'].append(bool(is_correct))
+            state['total_correct'] += bool(is_correct)
+            state['total_count'] += 1
         
-        recent_responses = responses[-3:]  # Last 3 questions
-        earlier_responses = responses[:-3] if len(responses) > 3 else responses[:len(responses)-3]
+        return state
+    
+    def _trend_from_state(self, state: Dict) -> str:
+        """Compare recent accuracy against earlier accuracy using running counters"""
+        recent = state['recent']
+        earlier_count = state['total_count'] - len(recent)
         
-        if not earlier_responses:
+        if len(recent) < self.trend_window or earlier_count <= 0:
             return 'insufficient_data'
         
-        recent_accuracy = sum(1 for r in recent_responses if r['correct']) / len(recent_responses)
-        earlier_accuracy = sum(1 for r in earlier_responses if r['correct']) / len(earlier_responses)
+        recent_correct = sum(recent)
+        recent_accuracy = recent_correct / len(recent)
+        earlier_accuracy = (state['total_correct'] - recent_correct) / earlier_count
         
         if recent_accuracy > earlier_accuracy + 0.1:
             return 'improving'
@@ -425,6 +596,10 @@ class AdaptiveTestEngine:
         else:
             return 'stable'
     
+    def analyze_performance_trend(self, responses: List[Dict]) -> str:
+        """Analyze if student performance is improving, declining, or stable"""
+        return self._trend_from_state(self._new_trend_state(responses))
+    
     def get_performance_recommendation(self, ability: float, responses: List[Dict]) -> str:
         """Get recommendation for student based on performance"""
         if not responses:
@@ -450,17 +625,28 @@ class AdaptiveTestEngine:
         
         final_ability = self.estimate_student_ability(responses)
         accuracy = sum(1 for r in responses if r['correct']) / len(responses)
+        timed_responses = [r['time_taken'] for r in responses if r['time_taken']]
+        
+        # Calculate performance by difficulty in one pass:
+        # [correct, answered, total time, timed answers] per difficulty
+        buckets = {'Easy': [0, 0, 0, 0], 'Medium': [0, 0, 0, 0], 'Hard': [0, 0, 0, 0]}
+        for r in responses:
+            bucket = buckets.get(r['difficulty'])
+            if bucket is None:
+                continue
+            bucket[0] += r['correct']
+            bucket[1] += 1
+            if r['time_taken']:
+                bucket[2] += r['time_taken']
+                bucket[3] += 1
         
-        # Calculate performance by difficulty
         difficulty_performance = {}
-        for difficulty in ['Easy', 'Medium', 'Hard']:
-            difficulty_responses = [r for r in responses if r['difficulty'] == difficulty]
-            if difficulty_responses:
-                difficulty_accuracy = sum(1 for r in difficulty_responses if r['correct']) / len(difficulty_responses)
+        for difficulty, (correct, count, time_sum, timed_count) in buckets.items():
+            if count:
                 difficulty_performance[difficulty] = {
-                    'accuracy': difficulty_accuracy,
-                    'count': len(difficulty_responses),
-                    'avg_time': np.mean([r['time_taken'] for r in difficulty_responses if r['time_taken']])
+                    'accuracy': correct / count,
+                    'count': count,
+                    'avg_time': time_sum / timed_count if timed_count else 0.0
                 }
         
         # Generate insights
@@ -479,8 +665,8 @@ class AdaptiveTestEngine:
                 'overall_accuracy': accuracy,
                 'final_ability_estimate': final_ability,
                 'performance_trend': self.analyze_performance_trend(responses),
-                'total_time': sum(r['time_taken'] for r in responses if r['time_taken']),
-                'avg_time_per_question': np.mean([r['time_taken'] for r in responses if r['time_taken']])
+                'total_time': sum(timed_responses),
+                'avg_time_per_question': fmean(timed_responses) if timed_responses else 0.0
             },
             'difficulty_breakdown': difficulty_performance,
             'insights': {
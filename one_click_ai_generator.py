@@ -4,19 +4,88 @@ Automatically scrapes rich content and generates high-quality questions
 NO manual prompts needed - fully automated!
 """
 
+import os
+import hashlib
+import importlib.util
 import sqlite3
 import logging
+import math
 import requests
-from bs4 import BeautifulSoup
-from typing import List, Dict
+from urllib3.util.retry import Retry
+from lxml import html as lxml_html
+from typing import List, Dict, Tuple
+import queue
 import random
-import time
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from transformers import pipeline, AutoTokenizer, AutoModelForSeq2SeqLM
 import torch
 
+try:
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    HAS_OPTIMUM = True
+except ImportError:
+    HAS_OPTIMUM = False
+
+# Only needed by transformers for device_map/low_cpu_mem_usage, so just check it is installed
+HAS_ACCELERATE = importlib.util.find_spec('accelerate') is not None
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Questions sharing their first 50 normalized characters count as duplicates
+DEDUP_PREFIX_LENGTH = 50
+
+# Question validation vocabulary, built once instead of per candidate
+_QUESTION_STARTERS = ('what', 'how', 'why', 'when', 'which', 'who', 'where', 'can', 'does', 'is', 'are')
+_VALID_STARTERS = _QUESTION_STARTERS + ('should', 'would', 'could')
+_GENERIC_PHRASES = ('most effective approach to implement', 'best way to', 'how would you')
+_ARTIFACTS = ('Question:', 'Q:', 'Answer:', 'Options:', '1.', '2.', '3.', '4.')
+# Strips each leading artifact in turn, in the order listed above
+_ARTIFACT_RE = re.compile('^' + ''.join(rf'(?:{re.escape(art)}\s*)?' for art in _ARTIFACTS))
+
+# Prompt prefixes; the context follows each one after a single space
+_PROMPT_TEMPLATES = (
+    "Generate a technical multiple-choice question about {topic} based on this:",
+    "Create a challenging question testing deep understanding of {topic}:",
+    "Write a practical scenario-based question about {topic} from:",
+    "Formulate an analytical question about {topic} concept:",
+    "Design a problem-solving question related to {topic}:",
+)
+MAX_PROMPT_TOKENS = 512
+
+# Generic distractors for _generate_smart_options
+_DISTRACTOR_TEMPLATES = (
+    "Alternative implementation of {topic}",
+    "Traditional approach without {topic}",
+    "Optimized version using different method",
+    "Standard technique in {topic}",
+    "None of the above",
+    "All of the above",
+    "Depends on the implementation",
+    "Not applicable in this scenario",
+)
+
+
+def _from_pretrained(loader, model_name: str, **kwargs):
+    """
+    Load model_name from the local Hugging Face cache without contacting the
+    Hub, downloading it only when it has not been cached yet.
+    """
+    try:
+        return loader.from_pretrained(model_name, local_files_only=True, **kwargs)
+    except OSError:
+        return loader.from_pretrained(model_name, **kwargs)
+
+
+def _question_hash(question: str) -> bytes:
+    """SHA1 of the normalized question prefix, stored in question.norm_hash"""
+    prefix = question.strip().lower()[:DEDUP_PREFIX_LENGTH]
+    return hashlib.sha1(prefix.encode()).digest()
+
+
 class OneClickAIGenerator:
     """
     Fully automated AI question generator
@@ -29,7 +98,52 @@ class OneClickAIGenerator:
     
     def __init__(self, db_path='aptitude_exam.db'):
         self.db_path = db_path
+        # One connection for the whole run; inserts are committed in batches
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # norm_hash values already stored, so most duplicates never reach SQLite
+        self._seen_hashes = set()
+        # Question rows waiting for the next executemany() flush
+        self._pending = []
+        # Guards _seen_hashes, _pending and _conn; the shared instance serves several request threads
+        self._save_lock = threading.RLock()
+        # False until app.py's init_database() has added the norm_hash column
+        self._has_norm_hash = True
+        self._load_seen_hashes()
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        # Half precision halves weight traffic on GPU; bf16 avoids T5's fp16 overflow where supported
+        self.torch_dtype = torch.float32
+        if self.device == "cuda":
+            self.torch_dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+        # Contexts per model.generate() call; lower this if the GPU runs out of memory
+        self.generation_batch_size = 16
+        # Sampled candidates per context; the first valid one is kept
+        self.candidates_per_context = 4
+        # Rolling fraction of contexts that end up saved; sizes the final batch
+        self._accept_rate = 0.5
+        # Token ids of each (template, topic) prompt prefix, filled on first use
+        self._prefix_ids = {}
+        # Sources scraped at once; fewer than content_sources, so sources still queued
+        # when generation reaches its target are never fetched
+        self.scrape_workers = 2
+        # Where the INT8 ONNX export used on CPU is kept between runs
+        self.onnx_cache_dir = os.path.join('cache', 'onnx')
+        
+        # Shared session so every source reuses pooled keep-alive connections
+        self.session = requests.Session()
+        self.session.headers.update({
+            'User-Agent': 'Mozilla/5.0',
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive'
+        })
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=5,
+            pool_maxsize=5,
+            max_retries=Retry(total=2, backoff_factor=0.3)
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
         logger.info(f"🚀 Initializing ONE-CLICK AI Generator on {self.device}")
         
         # Load better models for quality
@@ -66,6 +180,10 @@ class OneClickAIGenerator:
         
         # Fallback: Rich built-in knowledge base
         self.knowledge_base = self._build_knowledge_base()
+        # Flattened (paragraph, topic) pairs, built once and shuffled per run
+        self._kb_contexts = [
+            (p, topic) for topic, paragraphs in self.knowledge_base.items() for p in paragraphs
+        ]
     
     def load_models(self):
         """Load AI models for question generation"""
@@ -74,9 +192,12 @@ class OneClickAIGenerator:
             
             # Use FLAN-T5 for better quality questions
             model_name = "google/flan-t5-base"
-            self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-            self.model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
-            self.model.to(self.device)
+            self.tokenizer = _from_pretrained(AutoTokenizer, model_name)
+            self.model = None
+            if self.device == "cpu" and HAS_OPTIMUM:
+                self.model = self._load_onnx_int8(model_name)
+            if self.model is None:
+                self.model = self._load_pretrained(model_name)
             
             logger.info("✅ AI models loaded successfully")
             
@@ -84,14 +205,69 @@ class OneClickAIGenerator:
             logger.warning(f"⚠️ Could not load FLAN-T5, using fallback: {e}")
             # Fallback to simpler model
             try:
-                self.tokenizer = AutoTokenizer.from_pretrained("t5-base")
-                self.model = AutoModelForSeq2SeqLM.from_pretrained("t5-base")
-                self.model.to(self.device)
+                self.tokenizer = _from_pretrained(AutoTokenizer, "t5-base")
+                self.model = self._load_pretrained("t5-base")
             except:
                 logger.error("❌ Failed to load AI models")
                 self.model = None
                 self.tokenizer = None
     
+    def _load_pretrained(self, model_name: str):
+        """Load model_name's safetensors weights in self.torch_dtype onto self.device"""
+        load_kwargs = {'use_safetensors': True, 'torch_dtype': self.torch_dtype}
+        if HAS_ACCELERATE:
+            # Weights stream straight onto the device without a full CPU copy first
+            load_kwargs.update(low_cpu_mem_usage=True, device_map=self.device)
+        
+        model = _from_pretrained(AutoModelForSeq2SeqLM, model_name, **load_kwargs)
+        if not HAS_ACCELERATE:
+            model.to(self.device)
+        
+        if self.device == "cuda" and hasattr(model, "compile"):
+            # Only the encoder: its padded prompt shapes repeat across batches,
+            # whereas the decoder's growing KV cache would recompile every step
+            model.get_encoder().compile()
+        return model.eval()
+    
+    def _load_onnx_int8(self, model_name: str):
+        """
+        Load an INT8 dynamically quantized ONNX Runtime export of model_name
+        for CPU inference, exporting and quantizing it on first use.
+        Returns None if ONNX Runtime cannot be used.
+        """
+        export_dir = os.path.join(self.onnx_cache_dir, model_name.replace('/', '--'))
+        onnx_files = ['encoder_model.onnx', 'decoder_model.onnx', 'decoder_with_past_model.onnx']
+        
+        def quantized(name):
+            return name.replace('.onnx', '_quantized.onnx')
+        
+        try:
+            if not os.path.exists(os.path.join(export_dir, quantized(onnx_files[0]))):
+                logger.info("⚙️ Exporting FLAN-T5 to ONNX with INT8 quantization (first run only)...")
+                ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True).save_pretrained(export_dir)
+                
+                qconfig = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=True)
+                for file_name in onnx_files:
+                    if os.path.exists(os.path.join(export_dir, file_name)):
+                        quantizer = ORTQuantizer.from_pretrained(export_dir, file_name=file_name)
+                        quantizer.quantize(save_dir=export_dir, quantization_config=qconfig)
+            
+            with_past = quantized(onnx_files[2])
+            has_past = os.path.exists(os.path.join(export_dir, with_past))
+            model = ORTModelForSeq2SeqLM.from_pretrained(
+                export_dir,
+                encoder_file_name=quantized(onnx_files[0]),
+                decoder_file_name=quantized(onnx_files[1]),
+                decoder_with_past_file_name=with_past if has_past else None,
+                use_cache=has_past
+            )
+            logger.info("✅ Using INT8 ONNX Runtime model on CPU")
+            return model
+            
+        except Exception as e:
+            logger.warning(f"⚠️ ONNX Runtime unavailable, using PyTorch model: {e}")
+            return None
+    
     def _build_knowledge_base(self) -> Dict[str, List[str]]:
         """Build rich knowledge base for offline generation"""
         return {
@@ -198,118 +374,192 @@ class OneClickAIGenerator:
             ],
         }
     
-    def auto_scrape_content(self, source: Dict) -> List[str]:
-        """Auto-scrape rich content from web"""
+    def auto_scrape_content(self, source: Dict, stop: threading.Event = None) -> List[str]:
+        """Auto-scrape rich content from web; returns nothing once stop is set"""
         try:
+            if stop is not None and stop.is_set():
+                return []
             logger.info(f"🌐 Scraping: {source['topic']} from {source['url']}")
             
-            headers = {'User-Agent': 'Mozilla/5.0'}
-            response = requests.get(source['url'], headers=headers, timeout=10)
-            soup = BeautifulSoup(response.content, 'html.parser')
+            response = self.session.get(source['url'], timeout=10)
+            if stop is not None and stop.is_set():
+                return []
+            tree = lxml_html.fromstring(response.content)
             
+            # One lazy walk over every selector, stopping at the top 20 paragraphs
             paragraphs = []
-            for selector in source['selectors']:
-                elements = soup.find_all(selector)
-                for elem in elements:
-                    text = elem.get_text().strip()
-                    # Only keep substantial paragraphs
-                    if len(text) > 100 and len(text) < 800:
-                        paragraphs.append(text)
+            for elem in tree.iter(*source['selectors']):
+                text = elem.text_content().strip()
+                # Only keep substantial paragraphs
+                if len(text) > 100 and len(text) < 800:
+                    paragraphs.append(text)
+                    if len(paragraphs) >= 20:
+                        break
             
             logger.info(f"✅ Scraped {len(paragraphs)} paragraphs")
-            return paragraphs[:20]  # Limit to top 20
+            return paragraphs
             
         except Exception as e:
             logger.warning(f"⚠️ Scraping failed: {e}, using built-in knowledge")
             return []
     
+    def _produce_contexts(self, contexts: queue.Queue, futures: Dict):
+        """
+        Feed (paragraph, topic) pairs into contexts: the built-in knowledge
+        base right away, then each source's paragraphs as its scrape future
+        finishes. A trailing None marks the end.
+        """
+        try:
+            builtin = random.sample(self._kb_contexts, len(self._kb_contexts))
+            for item in builtin:
+                contexts.put(item)
+            
+            scraped = 0
+            for future in as_completed(futures):
+                # Scrapes cancelled once generation finished have nothing to add
+                paragraphs = [] if future.cancelled() else future.result()
+                random.shuffle(paragraphs)
+                for p in paragraphs:
+                    contexts.put((p, futures[future]['topic']))
+                scraped += len(paragraphs)
+            
+            logger.info(f"📚 Loaded {len(builtin)} built-in and {scraped} scraped contexts")
+        finally:
+            contexts.put(None)
+    
+    def _next_batch(self, contexts: queue.Queue, size: int) -> Tuple[List[Tuple[str, str]], bool]:
+        """
+        Wait for one context, then take whatever else is already queued, up to size.
+        The flag is True once the producer's end marker has been reached.
+        """
+        batch = []
+        item = contexts.get()
+        while item is not None:
+            batch.append(item)
+            if len(batch) >= size:
+                return batch, False
+            try:
+                item = contexts.get_nowait()
+            except queue.Empty:
+                return batch, False
+        return batch, True
+    
     def generate_from_text(self, context: str, topic: str) -> Dict:
         """Generate ONE high-quality question from context using AI"""
+        return self.generate_from_texts([(context, topic)])[0]
+    
+    def generate_from_texts(self, contexts: List[Tuple[str, str]]) -> List[Dict]:
+        """
+        Generate one question per (context, topic) pair with a single batched
+        model.generate() call. The result list lines up with contexts and
+        holds None wherever the generated question was rejected.
+        """
         if not self.model or not self.tokenizer:
-            return None
+            return [None] * len(contexts)
         
         try:
-            # ADVANCED PROMPTING for quality
-            prompts = [
-                f"Generate a technical multiple-choice question about {topic} based on this: {context}",
-                f"Create a challenging question testing deep understanding of {topic}: {context}",
-                f"Write a practical scenario-based question about {topic} from: {context}",
-                f"Formulate an analytical question about {topic} concept: {context}",
-                f"Design a problem-solving question related to {topic}: {context}",
-            ]
-            
-            prompt = random.choice(prompts)
-            
-            # Tokenize with optimal settings
-            inputs = self.tokenizer(
-                prompt, 
-                return_tensors="pt", 
-                max_length=512, 
-                truncation=True
+            # ADVANCED PROMPTING for quality; only the contexts need tokenizing
+            context_ids = self.tokenizer(
+                [context for context, _ in contexts],
+                add_special_tokens=False
+            ).input_ids
+            
+            input_ids = []
+            for (context, topic), ids in zip(contexts, context_ids):
+                prefix = self._prompt_prefix_ids(random.choice(_PROMPT_TEMPLATES), topic)
+                # Truncate the context so prefix + context + EOS fits the prompt budget
+                ids = ids[:MAX_PROMPT_TOKENS - len(prefix) - 1]
+                input_ids.append(prefix + ids + [self.tokenizer.eos_token_id])
+            
+            # Pad the whole batch to its longest prompt; on GPU round up to a multiple
+            # of 64 so the compiled encoder sees a handful of recurring shapes
+            inputs = self.tokenizer.pad(
+                {'input_ids': input_ids},
+                pad_to_multiple_of=64 if self.device == "cuda" else None,
+                return_tensors="pt"
             ).to(self.device)
             
-            # Generate with MAXIMUM quality settings
-            with torch.no_grad():
+            # Plain sampling of several candidates beats a 10-beam search per context
+            n = self.candidates_per_context
+            with torch.inference_mode():
                 outputs = self.model.generate(
-                    **inputs,
-                    max_length=150,
-                    num_beams=10,           # Maximum quality
-                    temperature=0.85,        # Balanced creativity
+                    input_ids=inputs['input_ids'],
+                    attention_mask=inputs['attention_mask'],
+                    max_new_tokens=64,
+                    num_beams=1,
                     do_sample=True,
-                    top_k=50,
-                    top_p=0.95,
+                    num_return_sequences=n,
+                    temperature=0.85,        # Balanced creativity
+                    top_p=0.9,
                     repetition_penalty=1.5,  # Strong anti-repetition
-                    length_penalty=1.2,
-                    no_repeat_ngram_size=3,
-                    early_stopping=True
+                    no_repeat_ngram_size=3
                 )
             
-            question = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
-            
-            # Clean and validate
-            question = self._clean_question(question)
-            
-            if not self._is_valid_question(question):
-                return None
-            
-            # Generate realistic options using context
-            options, correct = self._generate_smart_options(question, context, topic)
-            
-            if len(options) < 4:
-                return None
-            
-            return {
-                'question': question,
-                'option_a': options[0],
-                'option_b': options[1],
-                'option_c': options[2],
-                'option_d': options[3],
-                'correct_option': correct,
-                'topic': topic,
-                'difficulty': self._auto_detect_difficulty(question),
-                'category': 'ai_generated',
-                'source': 'one_click_ai',
-                'context': context[:200]
-            }
+            candidates = self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
             
         except Exception as e:
             logger.error(f"Generation error: {e}")
+            return [None] * len(contexts)
+        
+        # Candidates come back grouped per context; keep the first valid one
+        results = []
+        for i, (context, topic) in enumerate(contexts):
+            q_data = None
+            for question in candidates[i * n:(i + 1) * n]:
+                q_data = self._build_question(question, context, topic)
+                if q_data:
+                    break
+            results.append(q_data)
+        return results
+    
+    def _prompt_prefix_ids(self, template: str, topic: str) -> List[int]:
+        """Token ids for a prompt prefix, encoded once per (template, topic)"""
+        key = (template, topic)
+        if key not in self._prefix_ids:
+            self._prefix_ids[key] = self.tokenizer(
+                template.format(topic=topic),
+                add_special_tokens=False
+            ).input_ids
+        return self._prefix_ids[key]
+    
+    def _build_question(self, question: str, context: str, topic: str) -> Dict:
+        """Clean, validate and attach options to one generated question"""
+        # Clean and validate
+        question = self._clean_question(question)
+        
+        if not self._is_valid_question(question):
+            return None
+        
+        # Generate realistic options using context
+        options, correct = self._generate_smart_options(question, context, topic)
+        
+        if len(options) < 4:
             return None
+        
+        return {
+            'question': question,
+            'option_a': options[0],
+            'option_b': options[1],
+            'option_c': options[2],
+            'option_d': options[3],
+            'correct_option': correct,
+            'topic': topic,
+            'difficulty': self._auto_detect_difficulty(question),
+            'category': 'ai_generated',
+            'source': 'one_click_ai',
+            'context': context[:200]
+        }
     
     def _clean_question(self, q: str) -> str:
         """Clean generated question"""
         q = q.strip()
         
         # Remove artifacts
-        artifacts = ['Question:', 'Q:', 'Answer:', 'Options:', '1.', '2.', '3.', '4.']
-        for art in artifacts:
-            if q.startswith(art):
-                q = q[len(art):].strip()
+        q = _ARTIFACT_RE.sub('', q, count=1)
         
         # Ensure question mark
-        if not q.endswith('?'):
-            if any(q.lower().startswith(w) for w in ['what', 'how', 'why', 'when', 'which', 'who', 'where', 'can', 'does', 'is', 'are']):
-                q += '?'
+        if not q.endswith('?') and q.lower().startswith(_QUESTION_STARTERS):
+            q += '?'
         
         return q
     
@@ -318,17 +568,18 @@ class OneClickAIGenerator:
         if len(q) < 20 or len(q) > 300:
             return False
         
+        q_lower = q.lower()
+        
         # Must be a question
-        if not any(q.lower().startswith(w) for w in ['what', 'how', 'why', 'when', 'which', 'who', 'where', 'can', 'does', 'is', 'are', 'should', 'would', 'could']):
+        if not q_lower.startswith(_VALID_STARTERS):
             return False
         
         # Check for generic patterns
-        generic = ['most effective approach to implement', 'best way to', 'how would you']
-        if any(g in q.lower() for g in generic):
+        if any(g in q_lower for g in _GENERIC_PHRASES):
             return False
         
         # Check diversity
-        words = q.lower().split()
+        words = q_lower.split()
         if len(set(words)) / max(len(words), 1) < 0.6:
             return False
         
@@ -340,40 +591,26 @@ class OneClickAIGenerator:
         words = context.split()
         key_terms = [w for w in words if len(w) > 4 and w[0].isupper()]
         
-        # Context-based options
-        options = []
-        
         # Add one correct answer from context
         if key_terms:
-            correct_answer = random.choice(key_terms[:5])
-            options.append(correct_answer)
+            options = [random.choice(key_terms[:5])]
         else:
-            options.append("Based on the given context")
-        
-        # Add plausible distractors
-        distractors = [
-            f"Alternative implementation of {topic}",
-            f"Traditional approach without {topic}",
-            f"Optimized version using different method",
-            f"Standard technique in {topic}",
-            "None of the above",
-            "All of the above",
-            "Depends on the implementation",
-            "Not applicable in this scenario",
-        ]
+            options = ["Based on the given context"]
         
         # Mix specific and general distractors
         if len(key_terms) > 3:
-            options.extend(random.sample(key_terms[1:], min(2, len(key_terms)-1)))
+            options.extend(random.sample(key_terms[1:], 2))
         
-        options.extend(random.sample(distractors, 4 - len(options)))
-        options = options[:4]
+        options.extend(
+            template.format(topic=topic)
+            for template in random.sample(_DISTRACTOR_TEMPLATES, 4 - len(options))
+        )
         
-        random.shuffle(options)
-        correct_idx = options.index(options[0])  # First was correct
-        correct_letter = chr(65 + correct_idx)  # A, B, C, D
+        # Swap the correct answer into a random slot
+        slot = random.randrange(4)
+        options[0], options[slot] = options[slot], options[0]
         
-        return options, correct_letter
+        return options, chr(65 + slot)  # A, B, C, D
     
     def _auto_detect_difficulty(self, question: str) -> str:
         """Auto-detect difficulty level"""
@@ -389,53 +626,40 @@ class OneClickAIGenerator:
         
         return 'medium'
     
-    def _is_duplicate(self, question: str) -> bool:
-        """Check if question exists in database"""
+    def _load_seen_hashes(self):
+        """
+        Fill _seen_hashes from the database. The norm_hash column, its unique
+        index and the backfill come from init_database() in app.py; rows
+        inserted elsewhere since then have no hash and are hashed here in memory.
+        """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            normalized = question.lower().strip()
-            
-            # Exact match
-            cursor.execute("""
-                SELECT id FROM question 
-                WHERE LOWER(TRIM(question_text)) = ?
-                LIMIT 1
-            """, (normalized,))
-            
-            if cursor.fetchone():
-                conn.close()
-                return True
-            
-            # Similar (first 50 chars)
-            prefix = normalized[:50]
-            cursor.execute("""
-                SELECT id FROM question 
-                WHERE LOWER(SUBSTR(question_text, 1, 50)) = ?
-                LIMIT 1
-            """, (prefix,))
-            
-            result = cursor.fetchone() is not None
-            conn.close()
-            return result
-            
-        except:
-            return False
+            rows = self._conn.execute(
+                "SELECT norm_hash, CASE WHEN norm_hash IS NULL THEN question_text END FROM question"
+            )
+            for norm_hash, text in rows:
+                self._seen_hashes.add(norm_hash if norm_hash is not None else _question_hash(text or ''))
+            
+        except sqlite3.OperationalError as e:
+            logger.warning(f"⚠️ Duplicate index unavailable ({e}); deduplicating in memory only")
+            self._has_norm_hash = False
+            self._seen_hashes.update(
+                _question_hash(row[0] or '')
+                for row in self._conn.execute("SELECT question_text FROM question")
+            )
     
     def _save_question(self, q_data: Dict) -> bool:
-        """Save question to database"""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+        """
+        Queue question for saving; rows are written in batches by _flush().
+        Returns False for duplicates already in the database or this run.
+        A queued question only counts as saved once _flush() has committed it.
+        """
+        norm_hash = _question_hash(q_data['question'])
+        with self._save_lock:
+            if norm_hash in self._seen_hashes:
+                return False
             
-            cursor.execute("""
-                INSERT INTO question (
-                    question_text, option_a, option_b, option_c, option_d,
-                    correct_option, topic, difficulty, category, source,
-                    created_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
-            """, (
+            self._seen_hashes.add(norm_hash)
+            self._pending.append((
                 q_data['question'],
                 q_data['option_a'],
                 q_data['option_b'],
@@ -445,16 +669,47 @@ class OneClickAIGenerator:
                 q_data['topic'],
                 q_data['difficulty'],
                 q_data['category'],
-                q_data['source']
+                q_data['source'],
+                norm_hash
             ))
+        return True
+    
+    def _flush(self) -> int:
+        """
+        Insert and commit all queued questions in one executemany() call.
+        Returns the number of rows inserted; rows the unique index ignores are
+        not counted. On failure the rows stay queued for the next call.
+        """
+        with self._save_lock:
+            if not self._pending:
+                return 0
             
-            conn.commit()
-            conn.close()
-            return True
-            
-        except Exception as e:
-            logger.error(f"Save error: {e}")
-            return False
+            try:
+                if self._has_norm_hash:
+                    # Rows saved meanwhile by other writers are still caught by the unique index
+                    cursor = self._conn.executemany("""
+                        INSERT OR IGNORE INTO question (
+                            question_text, option_a, option_b, option_c, option_d,
+                            correct_option, topic, difficulty, category, source,
+                            norm_hash, created_at
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
+                    """, self._pending)
+                else:
+                    cursor = self._conn.executemany("""
+                        INSERT INTO question (
+                            question_text, option_a, option_b, option_c, option_d,
+                            correct_option, topic, difficulty, category, source, created_at
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
+                    """, [row[:-1] for row in self._pending])
+                self._conn.commit()
+            
+            except sqlite3.Error as e:
+                self._conn.rollback()
+                logger.error(f"Save error: {e}")
+                return 0
+            
+            self._pending.clear()
+            return cursor.rowcount
     
     def generate_one_click(self, target_count: int = 120) -> int:
         """
@@ -470,51 +725,66 @@ class OneClickAIGenerator:
         attempts = 0
         max_attempts = target_count * 5
         
-        # Try web scraping first
-        all_contexts = []
-        for source in self.content_sources:
-            paragraphs = self.auto_scrape_content(source)
-            if paragraphs:
-                all_contexts.extend([(p, source['topic']) for p in paragraphs])
-            time.sleep(1)  # Be nice to servers
-        
-        # Add built-in knowledge base
-        for topic, paragraphs in self.knowledge_base.items():
-            all_contexts.extend([(p, topic) for p in paragraphs])
-        
-        random.shuffle(all_contexts)
+        # Scrape in the background so generation starts on the built-in knowledge base
+        stop = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=min(self.scrape_workers, len(self.content_sources)))
+        futures = {
+            executor.submit(self.auto_scrape_content, source, stop): source
+            for source in self.content_sources
+        }
+        contexts = queue.Queue()
+        threading.Thread(target=self._produce_contexts, args=(contexts, futures), daemon=True).start()
         
-        logger.info(f"📚 Loaded {len(all_contexts)} rich contexts")
-        logger.info(f"🤖 Starting AI generation...\n")
+        logger.info("🤖 Starting AI generation while content is scraped...\n")
         
-        for context, topic in all_contexts:
-            if saved_count >= target_count:
-                break
-            
-            if attempts >= max_attempts:
-                logger.warning(f"⚠️ Reached maximum attempts ({max_attempts})")
-                break
-            
-            attempts += 1
-            
-            # Generate question
-            q_data = self.generate_from_text(context, topic)
-            
-            if not q_data:
-                continue
-            
-            # Check duplicate
-            if self._is_duplicate(q_data['question']):
-                skipped_count += 1
-                continue
-            
-            # Save
-            if self._save_question(q_data):
-                saved_count += 1
-                logger.info(f"✅ {saved_count}/{target_count}: [{topic}] {q_data['question'][:70]}...")
-            
-            if saved_count % 10 == 0 and saved_count > 0:
-                logger.info(f"📊 Progress: {saved_count} saved, {skipped_count} duplicates skipped\n")
+        try:
+            batch_size = self.generation_batch_size
+            exhausted = False
+            while not exhausted:
+                if saved_count >= target_count:
+                    break
+                
+                if attempts >= max_attempts:
+                    logger.warning(f"⚠️ Reached maximum attempts ({max_attempts})")
+                    break
+                
+                # Near the target, only queue as many contexts as should still be needed
+                needed = math.ceil((target_count - saved_count) / self._accept_rate)
+                batch, exhausted = self._next_batch(
+                    contexts, min(batch_size, max_attempts - attempts, needed)
+                )
+                if not batch:
+                    continue
+                attempts += len(batch)
+                queued_count = 0
+                
+                # Generate the whole batch in one model call
+                for (context, topic), q_data in zip(batch, self.generate_from_texts(batch)):
+                    if saved_count + queued_count >= target_count:
+                        break
+                    
+                    if not q_data:
+                        continue
+                    
+                    # Queue; duplicates are rejected by their norm_hash
+                    if self._save_question(q_data):
+                        queued_count += 1
+                        logger.info(f"✅ [{topic}] {q_data['question'][:70]}...")
+                    else:
+                        skipped_count += 1
+                
+                # Only rows actually committed count, so the rate tracks real inserts
+                batch_saved = self._flush()
+                saved_count += batch_saved
+                logger.info(f"📊 Progress: {saved_count}/{target_count} saved, {skipped_count} duplicates skipped\n")
+                
+                batch_rate = batch_saved / len(batch)
+                self._accept_rate = max(0.7 * self._accept_rate + 0.3 * batch_rate, 0.05)
+        finally:
+            saved_count += self._flush()
+            # Drop queued scrapes; one in flight returns nothing once its fetch completes
+            stop.set()
+            executor.shutdown(wait=False, cancel_futures=True)
         
         logger.info(f"\n{'='*100}")
         logger.info(f"🎉 ONE-CLICK GENERATION COMPLETE!")
@@ -527,6 +797,20 @@ class OneClickAIGenerator:
         return saved_count
 
 
+# Global generator instance, so the models load once per process
+_generator_instance = None
+_generator_lock = threading.Lock()
+
+def get_one_click_generator(db_path: str = 'aptitude_exam.db') -> OneClickAIGenerator:
+    """Get singleton generator instance, loading the models on first use"""
+    global _generator_instance
+    if _generator_instance is None:
+        with _generator_lock:
+            if _generator_instance is None:
+                _generator_instance = OneClickAIGenerator(db_path=db_path)
+    return _generator_instance
+
+
 # ONE-CLICK EXECUTION
 if __name__ == "__main__":
     print("\n" + "="*100)
@@ -8,21 +8,65 @@ def clean_text(text):
     """Normalize whitespace and remove excess spaces."""
     return ' '.join(str(text).split()).strip()
 
+def _question_text(qdata):
+    """Question text of a scraped item, or None if it is not a usable dict."""
+    if not isinstance(qdata, dict):
+        return None
+    question_text = qdata.get('question', qdata.get('question_text', ''))
+    if not question_text or len(question_text) < 10:
+        return None
+    return question_text
+
+def _build_question(qdata, question_text, topic):
+    """Build an unsaved Question and its preview dict from a scraped item."""
+    options = qdata.get('options', [])
+    answer = qdata.get('answer', '')
+    
+    # Determine correct option
+    correct_option = 'a'  # Default
+    if len(options) >= 4:
+        if answer == options[0] or 'a' in answer.lower():
+            correct_option = 'a'
+        elif answer == options[1] or 'b' in answer.lower():
+            correct_option = 'b'
+        elif answer == options[2] or 'c' in answer.lower():
+            correct_option = 'c'
+        elif answer == options[3] or 'd' in answer.lower():
+            correct_option = 'd'
+    
+    # Ensure we have 4 options
+    while len(options) < 4:
+        options.append(f'Option {len(options) + 1}')
+    
+    new_question = Question(
+        question_text=question_text,
+        option_a=options[0][:200] if options[0] else 'Option A',
+        option_b=options[1][:200] if len(options) > 1 else 'Option B', 
+        option_c=options[2][:200] if len(options) > 2 else 'Option C',
+        option_d=options[3][:200] if len(options) > 3 else 'Option D',
+        correct_option=correct_option,
+        topic=topic,
+        difficulty='Medium'
+    )
+    
+    return new_question, {
+        'question_text': question_text,
+        'option_a': new_question.option_a,
+        'option_b': new_question.option_b,
+        'option_c': new_question.option_c,
+        'option_d': new_question.option_d,
+        'correct_option': correct_option,
+        'topic': new_question.topic
+    }
+
 def save_question(qdata, topic='General'):
     """
     Save question using Flask-SQLAlchemy model
     Return the question dict for preview
     """
     try:
-        # Create question text from qdata
-        if isinstance(qdata, dict):
-            question_text = qdata.get('question', qdata.get('question_text', ''))
-            options = qdata.get('options', [])
-            answer = qdata.get('answer', '')
-        else:
-            return None
-        
-        if not question_text or len(question_text) < 10:
+        question_text = _question_text(qdata)
+        if not question_text:
             return None
             
         # Check if question already exists
@@ -30,59 +74,58 @@ def save_question(qdata, topic='General'):
         if existing:
             return None
         
-        # Determine correct option
-        correct_option = 'a'  # Default
-        if len(options) >= 4:
-            if answer == options[0] or 'a' in answer.lower():
-                correct_option = 'a'
-            elif answer == options[1] or 'b' in answer.lower():
-                correct_option = 'b'
-            elif answer == options[2] or 'c' in answer.lower():
-                correct_option = 'c'
-            elif answer == options[3] or 'd' in answer.lower():
-                correct_option = 'd'
-        
-        # Ensure we have 4 options
-        while len(options) < 4:
-            options.append(f'Option {len(options) + 1}')
-        
-        new_question = Question(
-            question_text=question_text,
-            option_a=options[0][:200] if options[0] else 'Option A',
-            option_b=options[1][:200] if len(options) > 1 else 'Option B', 
-            option_c=options[2][:200] if len(options) > 2 else 'Option C',
-            option_d=options[3][:200] if len(options) > 3 else 'Option D',
-            correct_option=correct_option,
-            topic=topic,
-            difficulty='Medium'
-        )
+        new_question, preview = _build_question(qdata, question_text, topic)
         
         db.session.add(new_question)
         db.session.commit()
         
-        return {
-            'question_text': question_text,
-            'option_a': new_question.option_a,
-            'option_b': new_question.option_b,
-            'option_c': new_question.option_c,
-            'option_d': new_question.option_d,
-            'correct_option': correct_option,
-            'topic': new_question.topic
-        }
+        return preview
     except Exception as e:
         print(f"Error saving question: {e}")
         db.session.rollback()
         return None
 
 def save_sample_questions(category, topic, count=5):
-    """Save sample questions when scraping fails"""
+    """
+    Save sample questions when scraping fails.
+    Existing questions are looked up with one IN query and new ones are
+    committed together.
+    """
     questions = get_sample_questions(category, topic, count)
-    saved_questions = []
     
+    candidates = []
     for q in questions:
         q['topic'] = topic
-        saved = save_question(q, topic)
-        if saved:
-            saved_questions.append(saved)
+        question_text = _question_text(q)
+        if question_text:
+            candidates.append((q, question_text))
+    if not candidates:
+        return []
     
-    return saved_questions
+    try:
+        texts = list({text for _, text in candidates})
+        seen = {
+            row.question_text for row in
+            Question.query.with_entities(Question.question_text)
+            .filter(Question.question_text.in_(texts))
+        }
+        
+        new_questions = []
+        saved_questions = []
+        for q, question_text in candidates:
+            if question_text in seen:
+                continue
+            seen.add(question_text)
+            
+            new_question, preview = _build_question(q, question_text, topic)
+            new_questions.append(new_question)
+            saved_questions.append(preview)
+        
+        db.session.add_all(new_questions)
+        db.session.commit()
+        
+        return saved_questions
+    except Exception as e:
+        print(f"Error saving questions: {e}")
+        db.session.rollback()
+        return []
@@ -1,16 +1,39 @@
 #!/usr/bin/env python3
 """Comprehensive web scraper for aptitude questions"""
 
+import asyncio
+import aiohttp
 import requests
 from bs4 import BeautifulSoup
 import sqlite3
 import threading
-import time
+import weakref
 import json
 from datetime import datetime
 import random
 from urllib.parse import urljoin, quote
 
+# Connection limits for the aiohttp connector; requests beyond them wait for a free slot
+MAX_CONCURRENT_REQUESTS = 64
+MAX_REQUESTS_PER_HOST = 8
+# Per-socket timeouts, so time queued for a connection slot does not count against a request
+REQUEST_TIMEOUT = 10
+
+# Rate-limit and server errors worth retrying with exponential backoff
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 3
+RETRY_BASE_DELAY = 0.5
+
+# Applied once per SQLite connection: WAL with relaxed fsync, and a 64 MB page cache
+# so a scraped batch commits from memory
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA mmap_size=268435456",
+)
+
 class ComprehensiveScraper:
     def __init__(self):
         self.progress = {
@@ -29,6 +52,10 @@ class ComprehensiveScraper:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
         
+        # One SQLite connection reused across scrape cycles; _db_lock serialises its users
+        self._db_lock = threading.Lock()
+        self._db = None
+        
         # Categories and their subtopics
         self.categories = {
             'Programming': ['Python', 'Java', 'C++', 'JavaScript', 'Data Structures'],
@@ -54,7 +81,38 @@ class ComprehensiveScraper:
         # Calculate total topics
         self.progress['total_topics'] = sum(len(topics) for topics in self.categories.values())
     
-    def scrape_geeksforgeeks(self, category: str, subtopic: str) -> list:
+    def _client_session(self) -> aiohttp.ClientSession:
+        """Create the shared aiohttp session for one scraping run"""
+        connector = aiohttp.TCPConnector(
+            limit=MAX_CONCURRENT_REQUESTS,
+            limit_per_host=MAX_REQUESTS_PER_HOST,
+            ssl=False
+        )
+        return aiohttp.ClientSession(
+            connector=connector,
+            headers=dict(self.session.headers),
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=REQUEST_TIMEOUT,
+                                          sock_read=REQUEST_TIMEOUT)
+        )
+    
+    async def _fetch(self, http: aiohttp.ClientSession, url: str):
+        """GET a URL, retrying 429/5xx responses with exponential backoff"""
+        for attempt in range(MAX_RETRIES + 1):
+            async with http.get(url) as response:
+                if response.status not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                    return response.status, await response.read()
+            
+            await asyncio.sleep(RETRY_BASE_DELAY * 2 ** attempt + random.uniform(0, RETRY_BASE_DELAY))
+    
+    def _run_async(self, scrape, *args):
+        """Run an async scrape to completion on a fresh aiohttp session"""
+        async def main():
+            async with self._client_session() as http:
+                return await scrape(http, *args)
+        
+        return asyncio.run(main())
+    
+    async def scrape_geeksforgeeks(self, http: aiohttp.ClientSession, category: str, subtopic: str) -> list:
         """Scrape questions from GeeksforGeeks"""
         questions = []
         
@@ -63,14 +121,14 @@ class ComprehensiveScraper:
             search_term = f"{category} {subtopic} questions"
             url = f"https://www.geeksforgeeks.org/{quote(search_term.lower().replace(' ', '-'))}"
             
-            response = self.session.get(url, timeout=10, verify=False)
-            if response.status_code != 200:
+            status, content = await self._fetch(http, url)
+            if status != 200:
                 # Try alternative URL pattern
                 url = f"https://www.geeksforgeeks.org/{quote(subtopic.lower().replace(' ', '-'))}-interview-questions/"
-                response = self.session.get(url, timeout=10, verify=False)
+                status, content = await self._fetch(http, url)
             
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
+            if status == 200:
+                soup = BeautifulSoup(content, 'html.parser')
                 
                 # Look for question patterns
                 question_elements = soup.find_all(['div', 'p', 'li'], class_=lambda x: x and any(
@@ -100,7 +158,7 @@ class ComprehensiveScraper:
         
         return questions
     
-    def scrape_sanfoundry(self, category: str, subtopic: str) -> list:
+    async def scrape_sanfoundry(self, http: aiohttp.ClientSession, category: str, subtopic: str) -> list:
         """Scrape questions from Sanfoundry"""
         questions = []
         
@@ -109,9 +167,9 @@ class ComprehensiveScraper:
             search_term = f"{subtopic} multiple choice questions"
             url = f"https://www.sanfoundry.com/{quote(search_term.lower().replace(' ', '-'))}"
             
-            response = self.session.get(url, timeout=10, verify=False)
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
+            status, content = await self._fetch(http, url)
+            if status == 200:
+                soup = BeautifulSoup(content, 'html.parser')
                 
                 # Look for MCQ patterns
                 mcq_elements = soup.find_all(['div', 'p'], class_=lambda x: x and 'question' in x.lower())
@@ -204,44 +262,58 @@ class ComprehensiveScraper:
         # Default to Easy
         return 'Easy'
     
+    def _connect(self) -> sqlite3.Connection:
+        """Open the question database with the write-tuning PRAGMAs applied"""
+        # Shared by whichever thread holds _db_lock
+        conn = sqlite3.connect("aptitude_exam.db", check_same_thread=False)
+        for pragma in SQLITE_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+    
+    @property
+    def db(self) -> sqlite3.Connection:
+        """The cached database connection, opened on first use; hold _db_lock while using it"""
+        if self._db is None:
+            self._db = self._connect()
+            # Closed when the scraper is garbage-collected or the interpreter exits
+            weakref.finalize(self, self._db.close)
+        return self._db
+    
     def bulk_insert_questions(self, questions):
         """Insert questions using direct SQLite connection instead of Flask app context"""
         if not questions:
             return 0
         
         try:
-            # Use direct SQLite connection instead of Flask app context
-            conn = sqlite3.connect("aptitude_exam.db")
-            cursor = conn.cursor()
+            rows = [(
+                q_data['question_text'],
+                q_data['option_a'],
+                q_data['option_b'],
+                q_data['option_c'],
+                q_data['option_d'],
+                q_data['correct_option'],
+                q_data['topic'],
+                q_data['difficulty']
+            ) for q_data in questions]
             
-            inserted = 0
-            for q_data in questions:
+            # Use direct SQLite connection instead of Flask app context
+            with self._db_lock:
+                conn = self.db
+                cursor = conn.cursor()
+                
+                # One transaction and one prepared statement for the whole batch
                 try:
-                    # Insert question
-                    cursor.execute("""
+                    cursor.execute("BEGIN")
+                    cursor.executemany("""
                     INSERT OR IGNORE INTO question 
                     (question_text, option_a, option_b, option_c, option_d, correct_option, topic, difficulty)
                     VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        q_data['question_text'],
-                        q_data['option_a'], 
-                        q_data['option_b'],
-                        q_data['option_c'],
-                        q_data['option_d'],
-                        q_data['correct_option'],
-                        q_data['topic'],
-                        q_data['difficulty']
-                    ))
-                    
-                    if cursor.rowcount > 0:
-                        inserted += 1
-                        
-                except Exception as e:
-                    print(f"❌ Error inserting question: {e}")
-                    continue
-            
-            conn.commit()
-            conn.close()
+                    """, rows)
+                    inserted = max(cursor.rowcount, 0)
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
             
             self.progress['questions_added'] += inserted
             print(f"✅ Inserted {inserted} new questions")
@@ -251,41 +323,42 @@ class ComprehensiveScraper:
             print(f"❌ Database error: {e}")
             return 0
 
-    def scrape_category_subtopics(self, category, subtopics):
+    async def scrape_subtopic(self, http, category, subtopic):
+        """Scrape one subtopic from GeeksforGeeks and Sanfoundry concurrently"""
+        try:
+            print(f"🔍 Scraping {category} -> {subtopic}")
+            self.progress['current_topic'] = subtopic
+            
+            gfg_questions, san_questions = await asyncio.gather(
+                self.scrape_geeksforgeeks(http, category, subtopic),
+                self.scrape_sanfoundry(http, category, subtopic)
+            )
+            
+            self.progress['topics_completed'] += 1
+            
+            return gfg_questions + san_questions
+            
+        except Exception as e:
+            print(f"❌ Error scraping {category}->{subtopic}: {e}")
+            return []
+    
+    async def scrape_category_subtopics(self, http, category, subtopics):
         """Fixed version without app context dependency"""
-        all_questions = []
+        results = await asyncio.gather(*[
+            self.scrape_subtopic(http, category, subtopic)
+            for subtopic in subtopics
+        ])
+        all_questions = [question for questions in results for question in questions]
         
-        for subtopic in subtopics:
-            try:
-                print(f"🔍 Scraping {category} -> {subtopic}")
-                
-                # Scrape from GeeksforGeeks
-                gfg_questions = self.scrape_geeksforgeeks(category, subtopic)
-                all_questions.extend(gfg_questions)
-                
-                # Scrape from Sanfoundry  
-                san_questions = self.scrape_sanfoundry(category, subtopic)
-                all_questions.extend(san_questions)
-                
-                self.progress['topics_completed'] += 1
-                
-                # Add delay to be respectful
-                time.sleep(1)
-                
-            except Exception as e:
-                print(f"❌ Error scraping {category}->{subtopic}: {e}")
-                continue
-        
-        # Insert questions
-        return self.bulk_insert_questions(all_questions)
+        # Insert questions off the event loop so other categories keep fetching
+        return await asyncio.to_thread(self.bulk_insert_questions, all_questions)
     
-    def worker(self, category_subtopics_pair):
-        """Worker thread function"""
-        category, subtopics = category_subtopics_pair
+    async def worker(self, http, category, subtopics):
+        """Scrape and store one category"""
         self.progress['current_category'] = category
         
         try:
-            inserted = self.scrape_category_subtopics(category, subtopics)
+            inserted = await self.scrape_category_subtopics(http, category, subtopics)
             self.progress['categories_completed'] += 1
             print(f"✅ Completed {category}: {inserted} questions added")
             
@@ -300,25 +373,14 @@ class ComprehensiveScraper:
         self.progress['status'] = 'running'
         self.progress['start_time'] = datetime.now()
         
-        # Create worker threads for each category
-        threads = []
-        for category, subtopics in self.categories.items():
-            thread = threading.Thread(
-                target=self.worker,
-                args=((category, subtopics),)
-            )
-            threads.append(thread)
-            thread.start()
-            
-            # Limit concurrent threads
-            if len(threads) >= 3:
-                for t in threads:
-                    t.join()
-                threads = []
+        # Scrape every category concurrently; the connector caps open requests per host
+        async def scrape_all(http):
+            await asyncio.gather(*[
+                self.worker(http, category, subtopics)
+                for category, subtopics in self.categories.items()
+            ])
         
-        # Wait for remaining threads
-        for thread in threads:
-            thread.join()
+        self._run_async(scrape_all)
         
         self.progress['status'] = 'completed'
         self.progress['end_time'] = datetime.now()
@@ -347,12 +409,12 @@ class ComprehensiveScraper:
             
             if source_name.lower() == 'geeksforgeeks':
                 # Scrape a few programming questions from GeeksforGeeks
-                questions = self.scrape_geeksforgeeks('Programming', 'Python')
+                questions = self._run_async(self.scrape_geeksforgeeks, 'Programming', 'Python')
                 return self.bulk_insert_questions(questions)
             
             elif source_name.lower() == 'sanfoundry':
                 # Scrape a few algorithm questions from Sanfoundry
-                questions = self.scrape_sanfoundry('Algorithms', 'Sorting')
+                questions = self._run_async(self.scrape_sanfoundry, 'Algorithms', 'Sorting')
                 return self.bulk_insert_questions(questions)
             
             elif source_name.lower() == 'indiabix':
@@ -378,7 +440,7 @@ class ComprehensiveScraper:
             
             elif source_name.lower() == 'javatpoint':
                 # Simulate scraping from JavaTpoint
-                java_questions = self.scrape_geeksforgeeks('Programming', 'Java')
+                java_questions = self._run_async(self.scrape_geeksforgeeks, 'Programming', 'Java')
                 return self.bulk_insert_questions(java_questions)
             
             else:
@@ -431,7 +493,9 @@ if __name__ == "__main__":
     
     # Test single category
     print(f"\n🧪 Testing single category scraping...")
-    questions = comprehensive_scraper.scrape_category_subtopics('Programming', ['Python'])
+    questions = comprehensive_scraper._run_async(
+        comprehensive_scraper.scrape_category_subtopics, 'Programming', ['Python']
+    )
     print(f"✅ Test completed: {questions} questions added")
     
     print(f"\n📊 Current progress:")
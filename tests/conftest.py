@@ -0,0 +1,17 @@
+"""Shared pytest fixtures"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Run in an empty directory so models/ and aptitude_exam.db stay out of the repo"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
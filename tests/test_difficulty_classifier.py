@@ -0,0 +1,80 @@
+"""Tests for the ML difficulty classifier"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("sklearn")
+
+from conftest import ROOT
+from ml_models.difficulty_classifier import (
+    DifficultyClassifier, _SAMPLE_DIFFICULTIES, _SAMPLE_QUESTIONS
+)
+
+
+@pytest.fixture
+def classifier(workdir):
+    """A classifier trained on the built-in sample questions"""
+    classifier = DifficultyClassifier(_lazy=True)
+    assert classifier.train_model(list(_SAMPLE_QUESTIONS), list(_SAMPLE_DIFFICULTIES))
+    return classifier
+
+
+def _load_in_fresh_process(workdir):
+    """Load the saved pipeline in a new interpreter and return the prediction method"""
+    script = (
+        "from ml_models.difficulty_classifier import DifficultyClassifier\n"
+        "classifier = DifficultyClassifier()\n"
+        "assert classifier.is_trained\n"
+        "print(classifier.predict('Explain inheritance in OOP')['method'])\n"
+    )
+    result = subprocess.run([sys.executable, '-c', script], cwd=workdir,
+                            env=dict(os.environ, PYTHONPATH=ROOT), capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    return result.stdout.strip().splitlines()[-1]
+
+
+def test_saved_model_loads_in_fresh_process(classifier, workdir):
+    assert _load_in_fresh_process(workdir).startswith('ml_model_')
+
+
+def test_model_saved_by_main_demo_loads_in_fresh_process(workdir):
+    """The __main__ demo must not save a pipeline pickled against __main__"""
+    demo = os.path.join(ROOT, 'ml_models', 'difficulty_classifier.py')
+    result = subprocess.run([sys.executable, demo], cwd=workdir,
+                            env=dict(os.environ, PYTHONPATH=ROOT), capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    
+    assert _load_in_fresh_process(workdir).startswith('ml_model_')
+
+
+@pytest.mark.parametrize('question, wrong_label', [
+    ("Define and implement a distributed consensus protocol tolerant to Byzantine faults", 'Easy'),
+    ("Implement a function that returns the sum of two numbers", 'Hard'),
+])
+def test_fast_path_skips_questions_that_only_start_canonically(classifier, question, wrong_label):
+    result = classifier.predict(question)
+    
+    assert result['method'] != 'fast_path'
+    assert result['difficulty'] != wrong_label
+
+
+def test_fast_path_answers_short_canonical_questions(classifier):
+    result = classifier.predict("Define CSS")
+    
+    assert result['method'] == 'fast_path'
+    assert result['difficulty'] == 'Easy'
+
+
+def test_benchmark_survives_a_label_seen_once(workdir, monkeypatch):
+    """Mixed-case labels from the DB can leave a class with a single sample"""
+    questions = list(_SAMPLE_QUESTIONS) + ["Prove the halting problem is undecidable"]
+    difficulties = list(_SAMPLE_DIFFICULTIES) + ['hard']
+    classifier = DifficultyClassifier(_lazy=True)
+    monkeypatch.setattr(classifier, 'get_enhanced_training_data', lambda: (questions, difficulties))
+    
+    results = classifier.benchmark_models()
+    
+    assert set(results) == {'naive_bayes', 'sgd', 'logistic'}
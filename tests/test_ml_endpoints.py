@@ -0,0 +1,38 @@
+"""Tests for the ML API blueprint"""
+
+import sqlite3
+
+import pytest
+
+flask = pytest.importorskip("flask")
+
+import ml_models.difficulty_classifier as difficulty_classifier
+from api.ml_endpoints import ml_api
+
+
+class _TrainingClassifier:
+    is_training = True
+    
+    def predict_batch(self, texts):
+        return [{'difficulty': 'Medium'} for _ in texts]
+
+
+@pytest.fixture
+def client(workdir):
+    app = flask.Flask(__name__)
+    app.register_blueprint(ml_api)
+    return app.test_client()
+
+
+def test_classify_all_waits_for_background_training(client, workdir, monkeypatch):
+    conn = sqlite3.connect("aptitude_exam.db")
+    conn.execute("CREATE TABLE question (id INTEGER PRIMARY KEY, question_text TEXT, difficulty TEXT)")
+    conn.execute("INSERT INTO question (question_text, difficulty) VALUES ('What is HTML?', 'Easy')")
+    conn.commit()
+    monkeypatch.setattr(difficulty_classifier, 'get_difficulty_classifier', lambda: _TrainingClassifier())
+    
+    response = client.post('/api/ml/classify_all')
+    
+    assert response.status_code == 503
+    assert conn.execute("SELECT difficulty FROM question").fetchone() == ('Easy',)
+    conn.close()